@@ -3,16 +3,131 @@ import sounddevice as sd
 import numpy as np
 import librosa
 import time
+import os
+import glob
+import queue
+import tempfile
+import threading
+
+# Number of samples per block in a disk recording (10 seconds at the default sample rate)
+DISK_BLOCK_SIZE = 22050 * 10
+
+# Number of samples analysed at once when extracting pitches from a disk recording
+PITCH_SEGMENT_SIZE = 22050 * 30
+
+# Samples of context analysed on each side of a segment so that pyin decodes its edges like a whole-file run
+PITCH_SEGMENT_MARGIN = 22050 * 5
+
+# Samples per callback chunk in a disk recording, and how many chunks may wait for the writer (about 5 seconds)
+DISK_CHUNK_SIZE = 1024
+DISK_QUEUE_SIZE = 22050 * 5 // DISK_CHUNK_SIZE
 
 # Global variables to control recording
 stop_recording = False
 recorded_data = []
+recorded_chunks = queue.Queue(maxsize=DISK_QUEUE_SIZE)
+disk_overflow = False  # Set when the writer fell behind and chunks were dropped
+disk_write_error = None  # Exception raised by the writer thread, if any
+
+# Audio buffer that spills recorded samples to a memory-mapped file on disk
+class DiskRecording:
+    def __init__(self, samplerate=22050, block_size=DISK_BLOCK_SIZE, directory=None):
+        fd, self.path = tempfile.mkstemp(suffix=".f32", dir=directory)
+        os.close(fd)
+        self.samplerate = samplerate
+        self.block_size = block_size
+        self.length = 0  # Number of samples written so far
+        self.block = None  # Memory map of the block currently being filled
+        self.block_start = 0  # Sample index where the current block starts
+        self.overflowed = False  # True if chunks were dropped because the disk could not keep up
+
+    def __len__(self):
+        return self.length
+
+    # Map the next fixed-size block of the file for writing
+    def _next_block(self):
+        if self.block is not None:
+            self.block.flush()
+        self.block_start = self.length
+        self.block = np.memmap(
+            self.path, dtype=np.float32, mode="r+" if self.length else "w+",
+            offset=self.block_start * 4, shape=(self.block_size,)
+        )
+
+    # Append an audio chunk, filling the current block and mapping new ones as needed
+    def write(self, chunk):
+        samples = np.asarray(chunk, dtype=np.float32)
+        if samples.ndim > 1:
+            samples = samples.mean(axis=1)  # Mix channels down to mono
+
+        written = 0
+        while written < len(samples):
+            if self.block is None or self.length - self.block_start == self.block_size:
+                self._next_block()
+            position = self.length - self.block_start
+            count = min(self.block_size - position, len(samples) - written)
+            self.block[position:position + count] = samples[written:written + count]
+            self.length += count
+            written += count
+
+    # Flush pending samples and release the write mapping
+    def finish(self):
+        if self.block is not None:
+            self.block.flush()
+            self.block = None
+
+    # Read-only memory map over all recorded samples (no data is copied into RAM)
+    def samples(self):
+        if self.length == 0:
+            return np.array([], dtype=np.float32)
+        return np.memmap(self.path, dtype=np.float32, mode="r", shape=(self.length,))
+
+    # Delete the backing file (a file still mapped on Windows is removed by remove_stale_recordings on next start)
+    def close(self):
+        self.finish()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
 
 # Callback function to collect audio data chunks
 def callback(indata, a, b, status):
     if not stop_recording:
         recorded_data.append(indata.copy())
 
+# Callback function to queue audio data chunks for the disk writer thread
+def disk_callback(indata, a, b, status):
+    global disk_overflow
+    if not stop_recording:
+        try:
+            recorded_chunks.put_nowait(indata.copy())
+        except queue.Full:
+            disk_overflow = True  # Drop the chunk rather than let memory grow
+
+# Writer thread that drains queued chunks into a disk recording until it receives None
+def write_chunks_to_disk(recording, chunks):
+    global stop_recording, disk_write_error
+    while True:
+        chunk = chunks.get()
+        if chunk is None:
+            return
+        if disk_write_error is not None:
+            continue  # Keep draining so the final None is always received
+
+        try:
+            recording.write(chunk)
+        except Exception as e:
+            disk_write_error = e
+            stop_recording = True  # Stop the callback from queueing more chunks
+
+# Function to delete disk recordings left behind by a previous run
+def remove_stale_recordings(directory):
+    for path in glob.glob(os.path.join(directory, "*.f32")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
 # Function to stop the recording
 def end():
     global stop_recording
@@ -36,19 +151,93 @@ def record_audio_in_time(duration, samplerate=22050):
     audio = np.concatenate(recorded_data, axis=0)
     return np.squeeze(audio)
 
+# Function to record audio for a given duration into a memory-mapped file, keeping memory use constant
+def record_audio_to_disk(duration, samplerate=22050, directory=None):
+    global stop_recording, recorded_chunks, disk_overflow, disk_write_error
+    recording = DiskRecording(samplerate, directory=directory)
+    recorded_chunks = queue.Queue(maxsize=DISK_QUEUE_SIZE)
+    disk_overflow = False
+    disk_write_error = None
+    stop_recording = False
+
+    # Disk I/O happens on a writer thread so the audio callback only copies chunks
+    writer = threading.Thread(target=write_chunks_to_disk, args=(recording, recorded_chunks), daemon=True)
+    writer.start()
+
+    try:
+        try:
+            # Open an audio input stream
+            with sd.InputStream(callback=disk_callback, channels=1, samplerate=samplerate, dtype="float32", blocksize=DISK_CHUNK_SIZE):
+                for _ in range(int(duration * 10)):  # Check every 0.1 seconds
+                    if stop_recording:
+                        break
+                    time.sleep(0.1)
+        finally:
+            recorded_chunks.put(None)  # No more chunks will follow
+            writer.join()
+
+        # Surface a failed disk write instead of returning a truncated recording
+        if disk_write_error is not None:
+            raise disk_write_error
+    except Exception:
+        recording.close()
+        raise
+
+    recording.overflowed = disk_overflow
+    if stop_recording:
+        recording.close()
+        return np.array([])
+
+    recording.finish()
+    return recording
+
+# Function to run pyin over a disk recording segment by segment through zero-copy views
+def _extract_pitches_in_segments(recording, hop_size, frame_length=2048):
+    audio = recording.samples()
+    samplerate = recording.samplerate
+    # Segment starts and margins are whole hops so frame times line up with a whole-file run
+    margin = max(1, PITCH_SEGMENT_MARGIN // hop_size) * hop_size
+    segment_size = max(hop_size, PITCH_SEGMENT_SIZE // hop_size * hop_size)
+    pitches = []
+
+    for start in range(0, len(audio), segment_size):
+        stop = min(start + segment_size, len(audio))
+        view_start = max(0, start - margin)
+        view_stop = min(len(audio), stop + margin)
+
+        segment_pitches, _, _ = librosa.pyin(
+            audio[view_start:view_stop], fmin=21.534, fmax=samplerate/2, sr=samplerate,
+            frame_length=frame_length, hop_length=hop_size
+        )
+
+        # Keep only the frames centred inside this segment; the last one keeps every trailing frame
+        first = (start - view_start) // hop_size
+        if stop == len(audio):
+            pitches.append(segment_pitches[first:])
+        else:
+            pitches.append(segment_pitches[first:first + (stop - start) // hop_size])
+
+    del audio
+    return np.concatenate(pitches) if pitches else np.array([])
+
 # Function to extract pitches from recorded audio
 def extract_pitches_from_recorded_audio(audio, latency_buffer, samplerate=22050, hop_size=512):
     if audio is None or len(audio) == 0:
         return np.array([])
 
-    # If stereo, convert to mono
-    if len(audio.shape) > 1:
-        audio = librosa.to_mono(audio)
+    if isinstance(audio, DiskRecording):
+        # Analyse the recording from disk in bounded segments
+        samplerate = audio.samplerate
+        pitches = _extract_pitches_in_segments(audio, hop_size)
+    else:
+        # If stereo, convert to mono
+        if len(audio.shape) > 1:
+            audio = librosa.to_mono(audio)
 
-    # Extract fundamental frequency (pitch) using librosa's pyin
-    pitches, _, _ = librosa.pyin(
-        audio, fmin=21.534, fmax=samplerate/2, sr=samplerate, hop_length=hop_size
-    )
+        # Extract fundamental frequency (pitch) using librosa's pyin
+        pitches, _, _ = librosa.pyin(
+            audio, fmin=21.534, fmax=samplerate/2, sr=samplerate, hop_length=hop_size
+        )
 
     # Replace NaNs with 0
     pitches = np.nan_to_num(pitches, nan=0.0)
@@ -1,7 +1,7 @@
 from flask import Blueprint, jsonify, request
 import os
 from musicXml_utils import get_time_signature_info, get_note_info, find_time_range_for_measures, get_tempo_info, get_measure_info, get_parts
-from audio_utils import record_audio_in_time, extract_pitches_from_recorded_audio, end
+from audio_utils import record_audio_in_time, record_audio_to_disk, extract_pitches_from_recorded_audio, end, DiskRecording, remove_stale_recordings
 from utils import shutdown_backend
 import threading
 
@@ -12,12 +12,18 @@ UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), "uploads")
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
+# Delete disk recordings left over from a previous session
+remove_stale_recordings(UPLOAD_FOLDER)
+
 # Global variables to hold uploaded MusicXML file and recording states
 MUSICXML_FILE = None 
 RECORDED_AUDIO = None
 DURATION = None
 LATENCY_BUFFER = None
 
+# Recordings at least this long (in seconds) are spilled to disk instead of kept in memory
+SPILL_TO_DISK_AFTER = 120
+
 # Initialize Flask Blueprint for the API routes
 api_routes = Blueprint("api_routes", __name__)
 
@@ -62,8 +68,20 @@ def record_audio():
         start_time, end_time = find_time_range_for_measures(MUSICXML_FILE, start_measure, end_measure, speed_multiplier, part_name)
         DURATION = end_time - start_time
 
-        # Record audio with duration plus latency buffer
-        RECORDED_AUDIO = record_audio_in_time(DURATION + LATENCY_BUFFER)
+        # Record audio with duration plus latency buffer, spilling long sessions to disk
+        previous_audio = RECORDED_AUDIO
+        if data.get("spill_to_disk") or DURATION + LATENCY_BUFFER >= SPILL_TO_DISK_AFTER:
+            audio = record_audio_to_disk(DURATION + LATENCY_BUFFER, directory=UPLOAD_FOLDER)
+        else:
+            audio = record_audio_in_time(DURATION + LATENCY_BUFFER)
+
+        # Replace the previous take only once the new one succeeded, removing its backing file if it had one
+        if isinstance(previous_audio, DiskRecording):
+            previous_audio.close()
+        RECORDED_AUDIO = audio
+
+        if isinstance(RECORDED_AUDIO, DiskRecording):
+            return jsonify({"message": "Salvestamine lõpetatud"})
         
         return jsonify({"message": "Salvestamine lõpetatud", "f": RECORDED_AUDIO.tolist()})
 
@@ -0,0 +1,43 @@
+import os
+import sys
+import types
+
+import pytest
+
+# Make the backend modules importable the same way app_develop.py does
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+
+# Stand-in for sounddevice.InputStream that delivers preset chunks to the callback when opened
+class FakeInputStream:
+    chunks = []
+    error = None
+
+    def __init__(self, callback, **kwargs):
+        self.callback = callback
+
+    def __enter__(self):
+        if FakeInputStream.error is not None:
+            raise FakeInputStream.error
+        for chunk in FakeInputStream.chunks:
+            self.callback(chunk, len(chunk), None, None)
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+# Tests run without audio hardware, so replace sounddevice before audio_utils imports it
+sounddevice = types.ModuleType("sounddevice")
+sounddevice.InputStream = FakeInputStream
+sys.modules["sounddevice"] = sounddevice
+
+
+# Fake input stream with no preset chunks or error, reset after each test
+@pytest.fixture
+def fake_input_stream():
+    FakeInputStream.chunks = []
+    FakeInputStream.error = None
+    yield FakeInputStream
+    FakeInputStream.chunks = []
+    FakeInputStream.error = None
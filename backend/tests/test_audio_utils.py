@@ -0,0 +1,169 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+import librosa
+
+import audio_utils
+from audio_utils import DiskRecording, extract_pitches_from_recorded_audio, record_audio_to_disk
+
+
+def write_recording(tmp_path, samples, block_size=1000, chunk_size=300, samplerate=22050):
+    recording = DiskRecording(samplerate, block_size=block_size, directory=tmp_path)
+    for start in range(0, len(samples), chunk_size):
+        recording.write(samples[start:start + chunk_size, None])
+    recording.finish()
+    return recording
+
+
+def test_disk_recording_round_trip_across_blocks(tmp_path):
+    samples = np.random.default_rng(0).random(5123).astype(np.float32)
+    recording = write_recording(tmp_path, samples)
+
+    assert len(recording) == 5123
+    np.testing.assert_array_equal(recording.samples(), samples)
+
+    recording.close()
+    assert not os.path.exists(recording.path)
+
+
+def test_disk_recording_chunk_larger_than_block(tmp_path):
+    samples = np.arange(2500, dtype=np.float32)
+    recording = write_recording(tmp_path, samples, block_size=700, chunk_size=2500)
+
+    np.testing.assert_array_equal(recording.samples(), samples)
+    recording.close()
+
+
+def test_disk_recording_mixes_stereo_to_mono(tmp_path):
+    recording = DiskRecording(directory=tmp_path)
+    recording.write(np.array([[0.2, 0.4], [1.0, 0.0]], dtype=np.float32))
+    recording.finish()
+
+    np.testing.assert_allclose(recording.samples(), [0.3, 0.5])
+    recording.close()
+
+
+def test_empty_disk_recording(tmp_path):
+    recording = DiskRecording(directory=tmp_path)
+    recording.finish()
+
+    assert len(recording) == 0
+    assert len(recording.samples()) == 0
+    assert len(extract_pitches_from_recorded_audio(recording, 0)) == 0
+    recording.close()
+
+
+def test_record_audio_to_disk_collects_chunks(tmp_path, fake_input_stream):
+    chunks = [np.full((256, 1), i, dtype=np.float32) for i in range(5)]
+    fake_input_stream.chunks = chunks
+
+    recording = record_audio_to_disk(0.1, directory=tmp_path)
+
+    np.testing.assert_array_equal(recording.samples(), np.concatenate(chunks)[:, 0])
+    assert not recording.overflowed
+    recording.close()
+
+
+def test_full_queue_drops_chunks(tmp_path, fake_input_stream, monkeypatch):
+    monkeypatch.setattr(audio_utils, "DISK_QUEUE_SIZE", 2)
+    # Hold the writer back until the stream has delivered every chunk
+    release_writer = threading.Event()
+    write = DiskRecording.write
+
+    def slow_write(self, chunk):
+        release_writer.wait()
+        write(self, chunk)
+
+    monkeypatch.setattr(DiskRecording, "write", slow_write)
+    monkeypatch.setattr(fake_input_stream, "__exit__", lambda self, *args: release_writer.set())
+    fake_input_stream.chunks = [np.full((256, 1), i, dtype=np.float32) for i in range(10)]
+
+    recording = record_audio_to_disk(0.1, directory=tmp_path)
+
+    assert recording.overflowed
+    assert len(recording) < 10 * 256
+    recording.close()
+
+
+def test_failed_disk_write_raises_and_removes_file(tmp_path, fake_input_stream, monkeypatch):
+    def fail(self, chunk):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(DiskRecording, "write", fail)
+    fake_input_stream.chunks = [np.zeros((256, 1), dtype=np.float32)] * 3
+
+    with pytest.raises(OSError, match="disk full"):
+        record_audio_to_disk(0.5, directory=tmp_path)
+
+    assert list(tmp_path.glob("*.f32")) == []
+
+
+def test_stopped_recording_removes_file(tmp_path, fake_input_stream, monkeypatch):
+    fake_input_stream.chunks = [np.zeros((256, 1), dtype=np.float32)]
+    monkeypatch.setattr(audio_utils.time, "sleep", lambda seconds: audio_utils.end())
+
+    audio = record_audio_to_disk(1, directory=tmp_path)
+
+    assert len(audio) == 0
+    assert list(tmp_path.glob("*.f32")) == []
+
+
+def test_failed_stream_removes_file(tmp_path, fake_input_stream):
+    fake_input_stream.error = RuntimeError("no input device")
+
+    with pytest.raises(RuntimeError):
+        record_audio_to_disk(1, directory=tmp_path)
+
+    assert list(tmp_path.glob("*.f32")) == []
+
+
+def test_remove_stale_recordings(tmp_path):
+    (tmp_path / "old.f32").write_bytes(b"\0" * 8)
+    (tmp_path / "Song.mxl").write_bytes(b"")
+
+    audio_utils.remove_stale_recordings(tmp_path)
+
+    assert [path.name for path in tmp_path.iterdir()] == ["Song.mxl"]
+
+
+@pytest.mark.parametrize("length, hop_size", [(512 * 3000, 512), (512 * 3000 + 77, 512), (40000, 500)])
+def test_segmented_frame_count_matches_whole_file(tmp_path, monkeypatch, length, hop_size):
+    # Samples hold their own index, and the stubbed pyin returns the index of every frame centre
+    def fake_pyin(audio, hop_length, **kwargs):
+        centres = np.arange(1 + len(audio) // hop_length, dtype=float) * hop_length
+        return audio[0] + centres, None, None
+
+    monkeypatch.setattr(audio_utils.librosa, "pyin", fake_pyin)
+    monkeypatch.setattr(audio_utils, "PITCH_SEGMENT_SIZE", 22050)
+    monkeypatch.setattr(audio_utils, "PITCH_SEGMENT_MARGIN", 2048)
+
+    recording = write_recording(tmp_path, np.arange(length, dtype=np.float32), block_size=50000, chunk_size=50000)
+    pitches = audio_utils._extract_pitches_in_segments(recording, hop_size)
+
+    np.testing.assert_array_equal(pitches, np.arange(1 + length // hop_size) * hop_size)
+    recording.close()
+
+
+def test_segmented_pitches_match_in_memory(tmp_path, monkeypatch):
+    samplerate = 22050
+    monkeypatch.setattr(audio_utils, "PITCH_SEGMENT_SIZE", samplerate * 2)
+    monkeypatch.setattr(audio_utils, "PITCH_SEGMENT_MARGIN", samplerate)
+
+    # A sung line with notes, silences and an octave jump across the segment boundaries
+    notes = [(220.0, 0.7), (0.0, 0.4), (330.0, 1.1), (440.0, 0.9), (0.0, 0.3), (220.0, 1.5), (261.63, 0.8)]
+    audio = np.concatenate([
+        0.5 * np.sin(2 * np.pi * freq * np.arange(int(samplerate * length)) / samplerate) if freq
+        else np.zeros(int(samplerate * length))
+        for freq, length in notes
+    ]).astype(np.float32)
+    assert len(audio) > audio_utils.PITCH_SEGMENT_SIZE
+
+    recording = write_recording(tmp_path, audio, block_size=samplerate, chunk_size=1024)
+
+    np.testing.assert_array_equal(
+        extract_pitches_from_recorded_audio(recording, 0.1),
+        extract_pitches_from_recorded_audio(audio, 0.1),
+    )
+    recording.close()